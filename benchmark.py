@@ -0,0 +1,161 @@
+"""
+benchmark.py - Benchmark der Prompt-Suche
+
+Erzeugt aus den mitgelieferten Prompts eine synthetische Bibliothek
+beliebiger Größe und vergleicht die Such-Varianten miteinander:
+- Latenz pro Anfrage (Median / p90), einzeln und parallel (mehrere Kerne)
+- Übereinstimmung der Treffer mit der einstufigen WRatio-Suche
+- Grenzfall: exakter Treffer "code" hinter vielen langen Teiltreffern
+  (gleiche Scores: gleich gute Treffer, ggf. andere Prompts bei Gleichstand)
+
+Aufruf:
+    python benchmark.py --size 50000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from query_log import percentile
+from search import PromptSearch
+
+
+BASE_DIR = Path(__file__).parent
+
+DEFAULT_QUERIES = [
+    "code", "code rev", "review", "sql abfrage", "pyhton", "zusamenfassung",
+    "grammatik", "text korrektur", "daten", "erklären", "orga", "mail",
+    "#code review", "tag:text", "perfomance", "pandas statistik",
+]
+
+# Grenzfall: viele lange Namen enthalten die Anfrage als Teilstring (partial_ratio = 100)
+# und stehen vor dem exakten Treffer. Ein Vorfilter mit festem Pool verliert ihn.
+EDGE_CASE_COUNT = 1000
+
+
+def build_library(size: int, seed: int = 42) -> List[Dict]:
+    """Erzeugt eine synthetische Bibliothek aus den Wörtern der Standard-Prompts.
+
+    Vorangestellt sind die Grenzfall-Einträge (EDGE_CASE_COUNT lange "code …"-Namen
+    sowie "codes" und "code").
+    """
+    rng = random.Random(seed)
+    words: List[str] = []
+    tags: List[str] = []
+    for name in ("prompts.json", "user_prompts.json"):
+        path = BASE_DIR / "data" / name
+        if not path.exists():
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read().strip()
+        for prompt in json.loads(raw) if raw else []:
+            words.extend(w for w in prompt.get("name", "").split() if w.isalpha())
+            tags.extend(t for t in prompt.get("tags", []) if len(t) < 30)
+    words = sorted(set(words)) or ["Prompt"]
+    tags = sorted(set(tags)) + ["mail", "kunde", "bericht", "meeting", "planung"]
+
+    library: List[Dict] = [
+        {
+            "id": f"edge-{i}",
+            "name": f"code helper for project number {i} with extras",
+            "tags": [],
+            "prompt": "",
+            "placeholders": [],
+            "usage_count": 0,
+        }
+        for i in range(EDGE_CASE_COUNT)
+    ]
+    library.append({"id": "edge-near", "name": "codes", "tags": [], "prompt": "", "placeholders": [], "usage_count": 0})
+    library.append({"id": "edge-exact", "name": "code", "tags": [], "prompt": "", "placeholders": [], "usage_count": 0})
+    for i in range(size):
+        name = " ".join(rng.sample(words, rng.randint(1, min(3, len(words)))))
+        library.append({
+            "id": f"bench-{i}",
+            "name": f"{name} {rng.randint(1, 999)}",
+            "tags": rng.sample(tags, rng.randint(1, 4)),
+            "prompt": "",
+            "placeholders": [],
+            "usage_count": rng.randint(0, 5),
+        })
+    return library
+
+
+def run_variant(engine: PromptSearch, queries: List[str], limit: int, repeat: int):
+    """Führt alle Anfragen aus und gibt (Latenzen in ms, Treffer-IDs je Anfrage) zurück."""
+    latencies: List[float] = []
+    results: Dict[str, List[str]] = {}
+    scores: Dict[str, List[float]] = {}
+    for query in queries:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hits = engine.search(query, limit=limit)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results[query] = [hit["id"] for hit in hits]
+        scores[query] = [round(hit.get("_score", 0), 1) for hit in hits]
+    return latencies, results, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark der Prompt-Suche")
+    parser.add_argument("--size", type=int, default=50000, help="Anzahl synthetischer Prompts")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen pro Anfrage")
+    parser.add_argument("--limit", type=int, default=7, help="Anzahl Ergebnisse pro Anfrage")
+    parser.add_argument("--workers", type=int, default=-1, help="Threads der parallelen Suche (-1 = alle Kerne)")
+    parser.add_argument("--query", action="append", help="Eigene Anfrage (mehrfach möglich)")
+    args = parser.parse_args()
+
+    queries = args.query or DEFAULT_QUERIES
+    print(f"CPU-Kerne: {os.cpu_count()} • parallele Worker: {args.workers}")
+    if args.workers == 1 or (args.workers < 0 and (os.cpu_count() or 1) < 2):
+        print("[WARNING] Nur ein Worker – die parallelen Varianten laufen seriell")
+    with tempfile.TemporaryDirectory() as tmp:
+        library_path = Path(tmp) / "bench_prompts.json"
+        with open(library_path, "w", encoding="utf-8") as f:
+            json.dump(build_library(args.size), f, ensure_ascii=False)
+
+        serial = dict(parallel_threshold=args.size + 1)
+        parallel = dict(parallel_threshold=1, workers=args.workers)
+        variants = {
+            "einstufig (WRatio)": dict(prefilter="none", **serial),
+            "Kaskade Länge": dict(prefilter="length", **serial),
+            "Pool partial_ratio": dict(prefilter="partial_ratio", **serial),
+            "Pool qratio": dict(prefilter="qratio", **serial),
+            "parallel einstufig": dict(prefilter="none", **parallel),
+            "parallel Kaskade Länge": dict(prefilter="length", **parallel),
+        }
+        reference = reference_scores = None
+        print(
+            f"{'Variante':<26}{'Median ms':>10}{'p90 ms':>10}"
+            f"{'Top-1 gleich':>14}{'Overlap':>10}{'Scores gleich':>15}{'Grenzfall':>11}"
+        )
+        for label, options in variants.items():
+            engine = PromptSearch([str(library_path)], **options)
+            latencies, results, scores = run_variant(engine, queries, args.limit, args.repeat)
+            if reference is None:
+                reference, reference_scores = results, scores
+            edge_ok = "edge-exact" in results.get("code", ["edge-exact"])
+            top1 = sum(
+                1 for q in queries if results[q][:1] == reference[q][:1]
+            ) / len(queries)
+            overlap = statistics.mean(
+                len(set(results[q]) & set(reference[q])) / len(reference[q]) if reference[q] else 1.0
+                for q in queries
+            )
+            same_scores = sum(
+                1 for q in queries if scores[q] == reference_scores[q]
+            ) / len(queries)
+            print(
+                f"{label:<26}{statistics.median(latencies):>10.1f}"
+                f"{percentile(latencies, 90):>10.1f}{top1:>14.0%}{overlap:>10.0%}{same_scores:>15.0%}"
+                f"{'ok' if edge_ok else 'verloren':>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,14 @@ class Config:
         "max_results": 7,
         "window_width": 500,
         "window_height": 400,
+        "search_min_score": 50,
+        "search_prefilter": "length",
+        "search_prefilter_cutoff": 40,
+        "search_prefilter_pool": 200,
+        "parallel_search_threshold": 0,
+        "search_workers": -1,
+        "query_log_enabled": False,
+        "query_log_path": "data/query_log.jsonl",
         "library_paths": [
             "data/prompts.json",
         ],
@@ -0,0 +1,192 @@
+"""
+query_log.py - Aufzeichnung und Replay von Suchanfragen
+
+Zeichnet (optional) die tastenweise Abfolge der Suchanfragen, den gewählten
+Prompt und die Latenzen auf. Prompt-Texte werden nicht gespeichert.
+Die Sitzungen lassen sich headless erneut durch PromptSearch schicken,
+um Latenz und Ranking auf echtem Nutzungsverhalten zu vergleichen.
+
+Log-Format (eine Zeile JSON pro Sitzung):
+    {"start": 1700000000.0, "events": [[offset_ms, query, latency_ms, n_results], ...],
+     "selected": "prompt-id", "index": 12, "rank": 0}
+
+"index" ist die Position des gewählten Prompts in der Bibliothek; IDs allein sind
+nicht eindeutig (derselbe Prompt kann in mehreren Bibliotheken stehen).
+
+Replay:
+    python query_log.py data/query_log.jsonl --limit 7
+"""
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from search import PromptSearch
+
+
+class QueryRecorder:
+    """Schreibt Such-Sitzungen als kompakte JSON-Lines-Datei.
+
+    Eine Sitzung beginnt beim Öffnen des Suchfensters und endet mit
+    der Auswahl eines Prompts oder dem Schließen des Fensters.
+    Aufgezeichnet werden nur Eingaben im Suchfeld.
+    """
+
+    def __init__(self, log_path: str):
+        """Args:
+            log_path: Pfad zur Log-Datei (wird bei Bedarf angelegt)
+        """
+        self.log_path = Path(log_path)
+        self._session: Optional[Dict] = None
+        self._session_start = 0.0
+
+    def start_session(self):
+        """Beginnt eine neue Sitzung (eine offene Sitzung wird vorher abgeschlossen)."""
+        self.end_session()
+        self._session_start = time.perf_counter()
+        self._session = {"start": round(time.time(), 3), "events": [], "selected": None, "index": None, "rank": None}
+
+    def record_query(self, query: str, latency_ms: float, result_count: int):
+        """Protokolliert eine Suchanfrage der laufenden Sitzung."""
+        if self._session is None:
+            return
+        offset_ms = (time.perf_counter() - self._session_start) * 1000
+        self._session["events"].append(
+            [round(offset_ms, 1), query, round(latency_ms, 2), result_count]
+        )
+
+    def record_selection(self, prompt_id: Optional[str], library_index: Optional[int], rank: int):
+        """Protokolliert den gewählten Prompt und seine Position in der Ergebnisliste.
+
+        Args:
+            prompt_id: ID des Prompts
+            library_index: Position des Prompts in der Bibliothek (`_index` des Treffers)
+            rank: Position in der Ergebnisliste (0 = erster Treffer)
+        """
+        if self._session is None:
+            return
+        self._session["selected"] = prompt_id
+        self._session["index"] = library_index
+        self._session["rank"] = rank
+
+    def end_session(self):
+        """Schließt die laufende Sitzung ab und hängt sie an die Log-Datei an."""
+        session, self._session = self._session, None
+        if not session or not session["events"]:
+            return
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(session, ensure_ascii=False, separators=(",", ":")) + "\n")
+        except Exception as e:
+            print(f"[ERROR] Fehler beim Schreiben des Query-Logs: {e}")
+
+
+def load_sessions(log_path: str) -> List[Dict]:
+    """Liest alle Sitzungen aus einer Log-Datei (fehlerhafte Zeilen werden übersprungen)."""
+    sessions: List[Dict] = []
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                sessions.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                print(f"[WARNING] Zeile {line_no} im Query-Log ungültig: {e}")
+    return sessions
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Gibt das pct-Perzentil (Nearest-Rank) einer Werteliste zurück."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def replay(sessions: List[Dict], engine: PromptSearch, limit: int = 7) -> Dict:
+    """Spielt Sitzungen deterministisch gegen eine Such-Engine ab.
+
+    Jede Anfrage wird in der aufgezeichneten Reihenfolge ausgeführt. Für die
+    letzte Anfrage einer Sitzung mit Auswahl wird der Rang des gewählten
+    Prompts bestimmt (None = nicht mehr unter den Treffern). Erkannt wird er an
+    ID und Bibliotheks-Position; ältere Aufzeichnungen ohne "index" nur an der ID.
+
+    Returns:
+        Report mit Latenzen (ms), Rängen und Vergleich zur Aufzeichnung
+    """
+    latencies: List[float] = []
+    ranks: List[Optional[int]] = []
+    changed = 0
+
+    for session in sessions:
+        results: List[Dict] = []
+        for event in session.get("events", []):
+            start = time.perf_counter()
+            results = engine.search(event[1], limit=limit)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        selected = session.get("selected")
+        if selected is None:
+            continue
+        index = session.get("index")
+        if index is None:
+            keys = [r.get("id") for r in results]
+            target = selected
+        else:
+            keys = [(r.get("id"), r.get("_index")) for r in results]
+            target = (selected, index)
+        rank = keys.index(target) if target in keys else None
+        ranks.append(rank)
+        if rank != session.get("rank"):
+            changed += 1
+
+    found = [r for r in ranks if r is not None]
+    return {
+        "sessions": len(sessions),
+        "queries": len(latencies),
+        "latency_p50": percentile(latencies, 50) if latencies else 0.0,
+        "latency_p90": percentile(latencies, 90) if latencies else 0.0,
+        "latency_p99": percentile(latencies, 99) if latencies else 0.0,
+        "latency_max": max(latencies) if latencies else 0.0,
+        "selections": len(ranks),
+        "top1_rate": sum(1 for r in found if r == 0) / len(ranks) if ranks else 0.0,
+        "mrr": sum(1 / (r + 1) for r in found) / len(ranks) if ranks else 0.0,
+        "mean_rank": statistics.mean(found) if found else None,
+        "missed": len(ranks) - len(found),
+        "rank_changed": changed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay aufgezeichneter Suchanfragen")
+    parser.add_argument("log", help="Pfad zum Query-Log (JSON Lines)")
+    parser.add_argument("--limit", type=int, default=7, help="Anzahl Ergebnisse pro Anfrage")
+    parser.add_argument("--library", action="append", help="Alternative Bibliothek (mehrfach möglich)")
+    parser.add_argument("--prefilter", default="length", help="Vorfilter der Such-Kaskade")
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.log)
+    engine = PromptSearch(args.library, prefilter=args.prefilter)
+    report = replay(sessions, engine, limit=args.limit)
+
+    print(f"Sitzungen:          {report['sessions']}")
+    print(f"Anfragen:           {report['queries']}")
+    print(
+        f"Latenz ms:          p50 {report['latency_p50']:.2f} • p90 {report['latency_p90']:.2f}"
+        f" • p99 {report['latency_p99']:.2f} • max {report['latency_max']:.2f}"
+    )
+    print(f"Auswahlen:          {report['selections']}")
+    print(f"Top-1-Rate:         {report['top1_rate']:.0%}")
+    print(f"MRR:                {report['mrr']:.3f}")
+    if report["mean_rank"] is not None:
+        print(f"Mittlerer Rang:     {report['mean_rank'] + 1:.2f}")
+    print(f"Nicht gefunden:     {report['missed']}")
+    print(f"Rang geändert:      {report['rank_changed']}")
+
+
+if __name__ == "__main__":
+    main()
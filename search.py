@@ -4,26 +4,225 @@ search.py - Fuzzy-Search Engine für Prompts
 Nutzt rapidfuzz für performantes, tippfehler-tolerantes Matching.
 """
 
+import bisect
 import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Optional
+from types import MappingProxyType
+from typing import Callable, Iterable, List, Dict, Mapping, Optional, Sequence, Set, Tuple
+import numpy as np
 from rapidfuzz import fuzz, process
 
+from templates import PromptTemplate
+
+
+# Günstige Vorfilter-Scorer für einen festen Kandidaten-Pool vor WRatio.
+# Verlustbehaftet: Gleichstände im Vorfilter werden nach Position abgeschnitten.
+PREFILTER_SCORERS = {
+    "qratio": fuzz.QRatio,
+    "partial_ratio": fuzz.partial_ratio,
+}
+
+# Gültige Werte für `prefilter` bzw. "search_prefilter" in config.json
+PREFILTER_MODES = ("length", "none", *PREFILTER_SCORERS)
+
+# Obergrenzen des WRatio-Scores je Längenverhältnis (längerer / kürzerer Text),
+# abgeleitet aus der Definition von WRatio in rapidfuzz:
+# < 1.5: beliebig (100), <= 8: partial_ratio * 0.9 (90), darüber: partial_ratio * 0.6 (60)
+WRATIO_LENGTH_BOUNDS = (100.0, 90.0, 60.0)
+
+# Blockgröße der Kaskade: nach jedem Block steigt der WRatio-Cutoff auf den
+# bisher k-besten Score, spätere Blöcke werden dadurch günstiger.
+# Parallel wird pro Worker ein Block bewertet (SCORE_CHUNK_SIZE * Worker je cdist-Aufruf).
+SCORE_CHUNK_SIZE = 4096
+
+# Tag-Filter im Suchfeld: "tag:code", "#code" oder "tag:\"mehrere Wörter\""
+TAG_FILTER_PATTERN = re.compile(r'(?<!\S)(?:tag:|#)(?:"([^"]+)"|(\S+))', re.IGNORECASE)
+
+
+def _normalize_tag(tag: str) -> str:
+    return tag.strip().lower()
+
+
+def _tag_keys(prompt: Dict) -> Set[str]:
+    """Gibt die normalisierten Tags eines Prompts zurück."""
+    return {_normalize_tag(t) for t in prompt.get("tags") or [] if t.strip()}
+
+
+def _text_lengths(texts: Sequence[str]) -> "np.ndarray":
+    """Gibt die Textlängen als schreibgeschütztes numpy-Array zurück."""
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    lengths.flags.writeable = False
+    return lengths
+
+
+def _search_text(prompt: Dict) -> str:
+    """Baut den durchsuchbaren Text (Name + Tags) eines Prompts."""
+    search_text = prompt.get("name", "")
+    tags = prompt.get("tags") or []
+    if tags:
+        search_text += " " + " ".join(tags)
+    return search_text
+
+
+@dataclass(frozen=True)
+class LibrarySnapshot:
+    """Unveränderlicher Stand der Bibliothek samt Suchindex.
+
+    Eine Suche arbeitet immer auf genau einem Snapshot. Änderungen erzeugen
+    einen neuen Snapshot (Copy-on-Write), die Prompt-Dicts eines veröffentlichten
+    Snapshots werden nicht mehr verändert.
+    """
+
+    generation: int
+    prompts: Tuple[Dict, ...]
+    searchable: Tuple[str, ...]
+    # Längen der Suchtexte für die Längen-Kaskade, einmal pro Snapshot berechnet
+    lengths: "np.ndarray" = field(compare=False)
+    tag_index: Mapping[str, Tuple[int, ...]]
+    templates: Tuple[PromptTemplate, ...]
+
+    @classmethod
+    def build(cls, prompts: List[Dict], generation: int) -> "LibrarySnapshot":
+        """Baut Suchtexte, Textlängen, Tag-Index (Tag -> sortierte Prompt-Indizes) und Vorlagen auf.
+
+        Das Feld "placeholders" der übergebenen (noch unveröffentlichten) Prompts
+        wird dabei aus der kompilierten Vorlage aktualisiert.
+        """
+        tag_index: Dict[str, List[int]] = {}
+        templates: List[PromptTemplate] = []
+        for index, prompt in enumerate(prompts):
+            for tag in _tag_keys(prompt):
+                tag_index.setdefault(tag, []).append(index)
+            template = PromptTemplate(prompt.get("prompt", ""))
+            prompt["placeholders"] = list(template.placeholders)
+            templates.append(template)
+        searchable = tuple(_search_text(p) for p in prompts)
+        return cls(
+            generation=generation,
+            prompts=tuple(prompts),
+            searchable=searchable,
+            lengths=_text_lengths(searchable),
+            tag_index=MappingProxyType({tag: tuple(ids) for tag, ids in tag_index.items()}),
+            templates=tuple(templates),
+        )
+
+    def with_prompt(self, index: Optional[int], prompt: Dict) -> "LibrarySnapshot":
+        """Gibt einen neuen Snapshot zurück, in dem `prompt` an Position `index` steht.
+
+        Args:
+            index: Zu ersetzende Position, None hängt den Prompt an
+            prompt: Neuer Prompt (wird nicht kopiert)
+        """
+        prompts = list(self.prompts)
+        searchable = list(self.searchable)
+        templates = list(self.templates)
+        if index is None:
+            index = len(prompts)
+            old_tags: Set[str] = set()
+            prompts.append(prompt)
+            searchable.append(_search_text(prompt))
+            templates.append(PromptTemplate(prompt.get("prompt", "")))
+        else:
+            old_tags = _tag_keys(prompts[index])
+            prompts[index] = prompt
+            searchable[index] = _search_text(prompt)
+            if templates[index].text != prompt.get("prompt", ""):
+                templates[index] = PromptTemplate(prompt.get("prompt", ""))
+
+        new_tags = _tag_keys(prompt)
+        tag_index = dict(self.tag_index)
+        for tag in old_tags - new_tags:
+            ids = tag_index[tag]
+            pos = bisect.bisect_left(ids, index)
+            ids = ids[:pos] + ids[pos + 1:]
+            if ids:
+                tag_index[tag] = ids
+            else:
+                del tag_index[tag]
+        for tag in new_tags - old_tags:
+            ids = tag_index.get(tag, ())
+            pos = bisect.bisect_left(ids, index)
+            tag_index[tag] = ids[:pos] + (index,) + ids[pos:]
+
+        if index < len(self.lengths):
+            lengths = self.lengths.copy()
+            lengths[index] = len(searchable[index])
+            lengths.flags.writeable = False
+        else:
+            lengths = _text_lengths(searchable)
+
+        return LibrarySnapshot(
+            generation=self.generation + 1,
+            prompts=tuple(prompts),
+            searchable=tuple(searchable),
+            lengths=lengths,
+            tag_index=MappingProxyType(tag_index),
+            templates=tuple(templates),
+        )
+
+    def find(self, prompt_id: str) -> Optional[int]:
+        """Gibt die Position des Prompts mit der ID zurück (oder None)."""
+        for index, prompt in enumerate(self.prompts):
+            if prompt.get("id") == prompt_id:
+                return index
+        return None
+
+    def filter_by_tags(self, tags: List[str]) -> List[int]:
+        """Schneidet die Indexlisten aller Tags; Ergebnis ist aufsteigend sortiert."""
+        id_lists = [self.tag_index.get(tag, ()) for tag in tags]
+        id_lists.sort(key=len)
+        if not id_lists[0]:
+            return []
+        candidates = set(id_lists[0])
+        for ids in id_lists[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                return []
+        return sorted(candidates)
+
 
 class PromptSearch:
     """Such-Engine für die Prompt-Bibliothek.
 
     Features:
     - Fuzzy-Matching mit rapidfuzz
+    - Verlustfreie Kaskade: Längen-Obergrenzen und steigender WRatio-Cutoff
+    - Optionale parallele Bewertung auf allen Kernen ab einer konfigurierbaren Bibliotheksgröße
     - Gewichtung nach Usage-Count
     - Suche in Name und Tags
+    - Tag-Filter per "tag:name" oder "#name" über einen Tag-Index
     - Unterstützung für zusätzliche Bibliotheken und User-Prompts
+    - Platzhalter-Vorlagen, beim Laden kompiliert (einzeln und im Batch befüllbar)
+    - Konsistente Suche während Reloads über unveränderliche Snapshots
     """
 
-    def __init__(self, library_paths: Optional[List[str]] = None):
+    def __init__(
+        self,
+        library_paths: Optional[List[str]] = None,
+        min_score: float = 50,
+        prefilter: str = "length",
+        prefilter_cutoff: float = 40,
+        prefilter_pool: int = 200,
+        parallel_threshold: int = 0,
+        workers: int = -1,
+    ):
         """Args:
             library_paths: Liste von Pfaden zu JSON-Bibliotheken.
                            Standard: data/prompts.json und data/user_prompts.json
+            min_score: Mindest-Score (WRatio), unter dem Treffer verworfen werden
+            prefilter: "length" (verlustfreie Längen-Kaskade), "qratio" oder
+                       "partial_ratio" (schneller Pool, verlustbehaftet) oder
+                       "none" für die einstufige WRatio-Suche; unbekannte
+                       Werte fallen mit Warnung auf "length" zurück
+            prefilter_cutoff: Mindest-Score im Vorfilter ("qratio", "partial_ratio")
+            prefilter_pool: Maximale Pool-Größe ("qratio", "partial_ratio")
+            parallel_threshold: Ab dieser Kandidatenzahl wird parallel bewertet
+                                (0 = nie; wirkt nur mit mehr als einem Worker)
+            workers: Anzahl Threads für die parallele Suche (-1 = alle Kerne)
         """
         base_dir = Path(__file__).parent
         default_paths = [
@@ -31,12 +230,41 @@ class PromptSearch:
             base_dir / "data" / "user_prompts.json",
         ]
         self.library_paths: List[Path] = [Path(p) for p in (library_paths or default_paths)]
-        self.prompts: List[Dict] = []
+        self.min_score = min_score
+        if prefilter not in PREFILTER_MODES:
+            print(f"[WARNING] Unbekannter Vorfilter '{prefilter}' – verwende 'length' (erlaubt: {', '.join(PREFILTER_MODES)})")
+            prefilter = "length"
+        self.prefilter = prefilter
+        self.prefilter_cutoff = prefilter_cutoff
+        self.prefilter_pool = prefilter_pool
+        self.parallel_threshold = parallel_threshold
+        self.workers = workers
+        # Suchen lesen self._snapshot genau einmal; Schreiber bauen unter dem Lock
+        # einen neuen Snapshot und veröffentlichen ihn per Referenz-Zuweisung.
+        self._snapshot = LibrarySnapshot.build([], generation=0)
+        self._write_lock = threading.RLock()
         self._load_libraries()
 
+    @property
+    def snapshot(self) -> LibrarySnapshot:
+        """Aktuell veröffentlichter Stand der Bibliothek."""
+        return self._snapshot
+
+    @property
+    def prompts(self) -> Tuple[Dict, ...]:
+        """Prompts des aktuellen Snapshots (nur lesend verwenden)."""
+        return self._snapshot.prompts
+
     def _load_libraries(self):
-        """Lädt alle Prompt-Bibliotheken."""
-        self.prompts = []
+        """Lädt alle Prompt-Bibliotheken und veröffentlicht einen neuen Snapshot."""
+        with self._write_lock:
+            prompts = self._read_libraries()
+            self._snapshot = LibrarySnapshot.build(prompts, self._snapshot.generation + 1)
+        print(f"[INFO] Gesamt: {len(prompts)} Prompts geladen")
+
+    def _read_libraries(self) -> List[Dict]:
+        """Liest alle Bibliotheken von der Platte."""
+        prompts: List[Dict] = []
 
         for path in self.library_paths:
             path = Path(path)
@@ -49,72 +277,319 @@ class PromptSearch:
                         else:
                             data = json.loads(raw)
                     if isinstance(data, list):
-                        self.prompts.extend(data)
+                        prompts.extend(data)
                     elif isinstance(data, dict) and "prompts" in data:
-                        self.prompts.extend(data["prompts"])
-                    print(f"[INFO] Bibliothek geladen: {path} ({len(self.prompts)} Prompts)")
+                        prompts.extend(data["prompts"])
+                    print(f"[INFO] Bibliothek geladen: {path} ({len(prompts)} Prompts)")
                 except Exception as e:
                     print(f"[ERROR] Fehler beim Laden von {path}: {e}")
             else:
                 print(f"[WARNING] Bibliothek nicht gefunden: {path}")
 
-        print(f"[INFO] Gesamt: {len(self.prompts)} Prompts geladen")
+        return prompts
+
+    @staticmethod
+    def _parse_query(query: str) -> Tuple[str, List[str]]:
+        """Trennt Tag-Filter vom Freitext der Suchanfrage.
+
+        Returns:
+            (Freitext, Liste normalisierter Tags)
+        """
+        tags = [
+            _normalize_tag(quoted or plain)
+            for quoted, plain in TAG_FILTER_PATTERN.findall(query)
+        ]
+        text = TAG_FILTER_PATTERN.sub(" ", query)
+        return " ".join(text.split()), [t for t in tags if t]
 
     def reload(self):
         """Lädt alle Bibliotheken neu."""
         self._load_libraries()
 
+    def reload_async(self, on_done: Optional[Callable[[LibrarySnapshot], None]] = None) -> threading.Thread:
+        """Lädt alle Bibliotheken in einem Hintergrund-Thread neu.
+
+        Laufende Suchen arbeiten bis zur Veröffentlichung auf dem alten Snapshot weiter.
+
+        Args:
+            on_done: Wird im Hintergrund-Thread mit dem neuen Snapshot aufgerufen
+        """
+        def run():
+            self._load_libraries()
+            if on_done:
+                on_done(self._snapshot)
+
+        thread = threading.Thread(target=run, name="prompt-reload", daemon=True)
+        thread.start()
+        return thread
+
     def search(self, query: str, limit: int = 5) -> List[Dict]:
-        """Sucht Prompts basierend auf der Anfrage."""
-        if not query.strip():
-            return self._get_top_prompts(limit)
-
-        searchable: List[str] = []
-        for prompt in self.prompts:
-            search_text = prompt.get("name", "")
-            tags = prompt.get("tags") or []
-            if tags:
-                search_text += " " + " ".join(tags)
-            searchable.append(search_text)
+        """Sucht Prompts basierend auf der Anfrage.
+
+        Tag-Filter ("tag:code", "#code") schränken die Kandidaten über den
+        Tag-Index ein, bevor das Fuzzy-Matching auf dem Rest läuft. Die gesamte
+        Suche läuft auf einem einzigen Snapshot.
+
+        Treffer sind Kopien der Prompts; `_index` gibt ihre Position in der Bibliothek
+        an (unterscheidet Prompts mit gleicher ID aus verschiedenen Bibliotheken).
+        """
+        snapshot = self._snapshot
+        text, tags = self._parse_query(query)
+        candidates: Optional[List[int]] = snapshot.filter_by_tags(tags) if tags else None
+
+        if not text:
+            return self._get_top_prompts(limit, snapshot, candidates)
+
+        if candidates is None:
+            indices = range(len(snapshot.searchable))
+            searchable = snapshot.searchable
+            lengths = snapshot.lengths
+        else:
+            indices = candidates
+            searchable = [snapshot.searchable[i] for i in candidates]
+            lengths = snapshot.lengths[candidates]
 
         if not searchable:
             return []
 
-        results = process.extract(
-            query,
-            searchable,
-            scorer=fuzz.WRatio,
-            limit=limit * 2,
-        )
-
         matched_prompts: List[Dict] = []
-        for match_text, score, index in results:
-            if score >= 50:
-                prompt = self.prompts[index].copy()
-                prompt["_score"] = score
-                usage_bonus = min(prompt.get("usage_count", 0) * 2, 20)
-                prompt["_final_score"] = score + usage_bonus
-                matched_prompts.append(prompt)
+        for position, score in self._score(text, searchable, lengths, limit * 2):
+            prompt = snapshot.prompts[indices[position]].copy()
+            prompt["_index"] = indices[position]
+            prompt["_score"] = score
+            usage_bonus = min(prompt.get("usage_count", 0) * 2, 20)
+            prompt["_final_score"] = score + usage_bonus
+            matched_prompts.append(prompt)
 
         matched_prompts.sort(key=lambda x: x["_final_score"], reverse=True)
         return matched_prompts[:limit]
 
-    def _get_top_prompts(self, limit: int) -> List[Dict]:
-        """Gibt die meistgenutzten Prompts zurück."""
-        sorted_prompts = sorted(
-            self.prompts,
-            key=lambda x: x.get("usage_count", 0),
-            reverse=True,
+    def _worker_count(self) -> int:
+        """Anzahl Threads, die rapidfuzz für `workers` tatsächlich verwendet."""
+        return self.workers if self.workers > 0 else (os.cpu_count() or 1)
+
+    def _use_parallel(self, candidate_count: int) -> bool:
+        """Prüft, ob die Bewertung auf mehrere Kerne verteilt werden soll."""
+        if not self.parallel_threshold or candidate_count < self.parallel_threshold:
+            return False
+        return self._worker_count() > 1
+
+    def _score(self, text: str, searchable: Sequence[str], lengths: "np.ndarray", limit: int) -> List[Tuple[int, float]]:
+        """Bewertet die Kandidaten mit WRatio und `min_score` als Cutoff.
+
+        Standard ("length") ist eine verlustfreie Kaskade: Die Kandidaten werden
+        nach ihrem Längenverhältnis zur Anfrage in Stufen mit bekannter
+        WRatio-Obergrenze eingeteilt (WRATIO_LENGTH_BOUNDS). Die Stufen werden
+        absteigend bewertet, der Cutoff steigt auf den bisher k-besten Score und
+        Stufen, deren Obergrenze darunter liegt, entfallen ganz. Das Ergebnis ist
+        identisch mit der einstufigen Suche ("none").
+
+        "qratio" und "partial_ratio" wählen dagegen mit einem günstigen Scorer einen
+        festen Pool von `prefilter_pool` Kandidaten aus (schneller, aber verlustbehaftet).
+
+        Args:
+            lengths: Längen der Texte in `searchable` (aus dem Snapshot)
+
+        Returns:
+            Liste von (Position in searchable, Score), absteigend nach Score
+        """
+        parallel = self._use_parallel(len(searchable))
+        prefilter_scorer = PREFILTER_SCORERS.get(self.prefilter)
+        pool = max(self.prefilter_pool, limit)
+        if prefilter_scorer is not None and len(searchable) > pool:
+            positions = self._prefilter_pool(text, searchable, prefilter_scorer, pool, parallel)
+            choices = [searchable[position] for position in positions]
+            hits = self._score_tiers(text, choices, limit, [(100.0, range(len(choices)))], parallel)
+            return [(positions[position], score) for position, score in hits]
+
+        if self.prefilter == "length":
+            tiers = self._length_tiers(len(text), lengths)
+        else:
+            tiers = [(100.0, range(len(searchable)))]
+        return self._score_tiers(text, searchable, limit, tiers, parallel)
+
+    def _score_tiers(self, text: str, searchable: Sequence[str], limit: int, tiers, parallel: bool) -> List[Tuple[int, float]]:
+        """Bewertet Kandidaten-Stufen (Obergrenze, Positionen) absteigend mit WRatio.
+
+        Bei mehreren Kernen übernimmt `process.cdist` die Bewertung: Die Kandidaten
+        bilden die Zeilen der Score-Matrix, sodass rapidfuzz sie in Shards auf die
+        Worker aufteilt. Die Treffer aller Stufen und Shards werden per Top-K
+        zusammengeführt (Gleichstände nach Position, wie bei `process.extract`).
+        """
+        hits: List[Tuple[float, int]] = []
+        chunk_size = SCORE_CHUNK_SIZE * self._worker_count() if parallel else SCORE_CHUNK_SIZE
+        for bound, positions in self._chunked(tiers, chunk_size):
+            cutoff = self.min_score
+            if len(hits) >= limit:
+                cutoff = max(cutoff, hits[limit - 1][0])
+            if len(positions) == 0 or bound < cutoff:
+                continue
+            if bound < 100 and cutoff >= bound:
+                # Die Obergrenze der Stufe erreicht nur partial_ratio == 100,
+                # also ein exakter Teilstring-Treffer
+                positions = [
+                    position for position in positions
+                    if self._contains(text, searchable[position])
+                ]
+                if not positions:
+                    continue
+
+            if len(positions) == len(searchable):
+                choices = searchable
+            else:
+                choices = [searchable[position] for position in positions]
+
+            if parallel:
+                scores = process.cdist(
+                    choices,
+                    [text],
+                    scorer=fuzz.WRatio,
+                    score_cutoff=cutoff,
+                    workers=self.workers,
+                    dtype=np.float64,
+                )[:, 0]
+                best = self._top_k(scores, np.arange(len(choices)), limit, cutoff)
+                hits.extend((float(scores[i]), int(positions[i])) for i in best)
+            else:
+                results = process.extract(
+                    text,
+                    choices,
+                    scorer=fuzz.WRatio,
+                    score_cutoff=cutoff,
+                    limit=limit,
+                )
+                hits.extend((score, positions[i]) for _, score, i in results)
+
+            hits.sort(key=lambda hit: (-hit[0], hit[1]))
+            del hits[limit:]
+
+        return [(position, score) for score, position in hits]
+
+    @staticmethod
+    def _contains(text: str, candidate: str) -> bool:
+        """Prüft, ob der kürzere der beiden Texte im längeren enthalten ist."""
+        return text in candidate if len(text) <= len(candidate) else candidate in text
+
+    @staticmethod
+    def _chunked(tiers, chunk_size: int):
+        """Zerlegt große Stufen in Blöcke, damit der Cutoff zwischen den Blöcken steigen kann."""
+        for bound, positions in tiers:
+            if len(positions) <= chunk_size:
+                yield bound, positions
+                continue
+            for start in range(0, len(positions), chunk_size):
+                yield bound, positions[start:start + chunk_size]
+
+    @staticmethod
+    def _length_tiers(query_len: int, lengths: "np.ndarray"):
+        """Teilt die Kandidaten nach Längenverhältnis in Stufen (Obergrenze, Positionen)."""
+        near_bound, mid_bound, far_bound = WRATIO_LENGTH_BOUNDS
+        longer = np.maximum(lengths, query_len)
+        shorter = np.minimum(lengths, query_len)
+        near = 2 * longer < 3 * shorter
+        mid = ~near & (longer <= 8 * shorter)
+        far = ~(near | mid)
+        return [
+            (near_bound, np.flatnonzero(near).tolist()),
+            (mid_bound, np.flatnonzero(mid).tolist()),
+            (far_bound, np.flatnonzero(far).tolist()),
+        ]
+
+    def _prefilter_pool(self, text: str, searchable: Sequence[str], scorer, pool: int, parallel: bool) -> List[int]:
+        """Wählt mit einem günstigen Scorer die besten `pool` Positionen aus (aufsteigend sortiert)."""
+        if parallel:
+            scores = process.cdist(
+                searchable,
+                [text],
+                scorer=scorer,
+                score_cutoff=self.prefilter_cutoff,
+                workers=self.workers,
+                dtype=np.float64,
+            )[:, 0]
+            best = self._top_k(scores, np.arange(len(searchable)), pool, self.prefilter_cutoff)
+            return sorted(int(position) for position in best)
+
+        survivors = process.extract(
+            text,
+            searchable,
+            scorer=scorer,
+            score_cutoff=self.prefilter_cutoff,
+            limit=pool,
         )
-        return sorted_prompts[:limit]
+        # Ursprüngliche Reihenfolge beibehalten, damit Gleichstände wie bei
+        # der einstufigen Suche nach Position aufgelöst werden
+        return sorted(position for _, _, position in survivors)
+
+    @staticmethod
+    def _top_k(scores, positions, k: int, cutoff: float):
+        """Wählt die k besten Positionen mit Score >= cutoff (absteigend, stabil)."""
+        hits = np.flatnonzero(scores >= cutoff)
+        if len(hits) > k:
+            kth = np.partition(scores[hits], len(hits) - k)[len(hits) - k]
+            hits = hits[scores[hits] >= kth]
+        order = np.lexsort((hits, -scores[hits]))[:k]
+        return positions[hits[order]]
+
+    def get_template(self, prompt_id: str, text: Optional[str] = None) -> Optional[PromptTemplate]:
+        """Gibt die beim Laden kompilierte Vorlage eines Prompts zurück.
+
+        IDs sind über mehrere Bibliotheken hinweg nicht eindeutig. Mit `text` wird
+        nur eine Vorlage mit genau diesem Prompt-Text geliefert; gibt es keine,
+        wird der Text neu kompiliert.
+        """
+        snapshot = self._snapshot
+        for index, prompt in enumerate(snapshot.prompts):
+            if prompt.get("id") != prompt_id:
+                continue
+            template = snapshot.templates[index]
+            if text is None or template.text == text:
+                return template
+        return None if text is None else PromptTemplate(text)
+
+    def render_batch(self, prompt_id: str, rows: Iterable[Mapping[str, str]]) -> Optional[List[str]]:
+        """Befüllt die Vorlage eines Prompts mit vielen Wertesätzen (z.B. CSV-Zeilen).
+
+        Returns:
+            Liste der befüllten Prompt-Texte oder None, wenn die ID unbekannt ist
+        """
+        template = self.get_template(prompt_id)
+        if template is None:
+            return None
+        return list(template.render_many(rows))
+
+    def _get_top_prompts(
+        self,
+        limit: int,
+        snapshot: Optional[LibrarySnapshot] = None,
+        indices: Optional[Sequence[int]] = None,
+    ) -> List[Dict]:
+        """Gibt die meistgenutzten Prompts zurück (optional aus einer Teilmenge von Positionen)."""
+        snapshot = snapshot or self._snapshot
+        prompts = snapshot.prompts
+        top = sorted(
+            range(len(prompts)) if indices is None else indices,
+            key=lambda index: prompts[index].get("usage_count", 0),
+            reverse=True,
+        )[:limit]
+        # Kopien ausgeben, die Dicts des Snapshots bleiben unverändert
+        results: List[Dict] = []
+        for index in top:
+            prompt = prompts[index].copy()
+            prompt["_index"] = index
+            results.append(prompt)
+        return results
 
     def increment_usage(self, prompt_id: str):
         """Erhöht den Usage-Counter für einen Prompt."""
-        for prompt in self.prompts:
-            if prompt.get("id") == prompt_id:
-                prompt["usage_count"] = prompt.get("usage_count", 0) + 1
-                self._save_usage_counts()
-                break
+        with self._write_lock:
+            snapshot = self._snapshot
+            index = snapshot.find(prompt_id)
+            if index is None:
+                return
+            prompt = dict(snapshot.prompts[index])
+            prompt["usage_count"] = prompt.get("usage_count", 0) + 1
+            self._snapshot = snapshot.with_prompt(index, prompt)
+            self._save_usage_counts()
 
     def _save_usage_counts(self):
         """Speichert die aktualisierten Usage-Counts.
@@ -126,16 +601,17 @@ class PromptSearch:
         path = Path(self.library_paths[0])
         try:
             with open(path, "w", encoding="utf-8") as f:
-                json.dump(self.prompts, f, ensure_ascii=False, indent=2)
+                json.dump(list(self._snapshot.prompts), f, ensure_ascii=False, indent=2)
         except Exception as e:
             print(f"[ERROR] Fehler beim Speichern: {e}")
 
     def add_library(self, path: str):
         """Fügt eine neue Bibliothek hinzu und lädt sie."""
         p = Path(path)
-        if p not in self.library_paths:
-            self.library_paths.append(p)
-        self._load_libraries()
+        with self._write_lock:
+            if p not in self.library_paths:
+                self.library_paths.append(p)
+            self._load_libraries()
 
     def add_prompt(self, name: str, prompt_text: str, tags: Optional[List[str]] = None) -> Dict:
         """Fügt einen neuen Prompt zur User-Bibliothek hinzu.
@@ -146,95 +622,102 @@ class PromptSearch:
         tags = tags or []
         prompt_id_base = name.strip().lower().replace(" ", "-")
         prompt_id = prompt_id_base
-        existing_ids = {p.get("id") for p in self.prompts}
-        i = 1
-        while prompt_id in existing_ids:
-            prompt_id = f"{prompt_id_base}-{i}"
-            i += 1
-
-        new_prompt = {
-            "id": prompt_id,
-            "name": name,
-            "tags": tags,
-            "prompt": prompt_text,
-            "placeholders": [],
-            "usage_count": 0,
-        }
-
-        # Im Speicher ergänzen
-        self.prompts.append(new_prompt)
-
-        # In user_prompts.json persistieren
-        user_path = Path(__file__).parent / "data" / "user_prompts.json"
-        try:
-            if user_path.exists():
-                with open(user_path, "r", encoding="utf-8") as f:
-                    raw = f.read().strip()
-                    user_data = json.loads(raw) if raw else []
-            else:
-                user_data = []
-            if isinstance(user_data, dict) and "prompts" in user_data:
-                user_data = user_data["prompts"]
-            user_data.append(new_prompt)
-            with open(user_path, "w", encoding="utf-8") as f:
-                json.dump(user_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"[ERROR] Fehler beim Speichern in user_prompts.json: {e}")
 
-        return new_prompt
+        with self._write_lock:
+            snapshot = self._snapshot
+            existing_ids = {p.get("id") for p in snapshot.prompts}
+            i = 1
+            while prompt_id in existing_ids:
+                prompt_id = f"{prompt_id_base}-{i}"
+                i += 1
+
+            new_prompt = {
+                "id": prompt_id,
+                "name": name,
+                "tags": tags,
+                "prompt": prompt_text,
+                "placeholders": list(PromptTemplate(prompt_text).placeholders),
+                "usage_count": 0,
+            }
+
+            # Im Speicher ergänzen
+            self._snapshot = snapshot.with_prompt(None, new_prompt)
+
+            # In user_prompts.json persistieren – noch unter dem Lock, sonst liest ein
+            # paralleler Reload die alte Datei und verwirft den neuen Prompt
+            user_path = Path(__file__).parent / "data" / "user_prompts.json"
+            try:
+                if user_path.exists():
+                    with open(user_path, "r", encoding="utf-8") as f:
+                        raw = f.read().strip()
+                        user_data = json.loads(raw) if raw else []
+                else:
+                    user_data = []
+                if isinstance(user_data, dict) and "prompts" in user_data:
+                    user_data = user_data["prompts"]
+                user_data.append(new_prompt)
+                with open(user_path, "w", encoding="utf-8") as f:
+                    json.dump(user_data, f, ensure_ascii=False, indent=2)
+            except Exception as e:
+                print(f"[ERROR] Fehler beim Speichern in user_prompts.json: {e}")
+
+        return new_prompt.copy()
 
     def update_prompt(self, prompt_id: str, name: str, prompt_text: str, tags: Optional[List[str]] = None) -> Optional[Dict]:
         """Aktualisiert einen bestehenden Prompt in der User-Bibliothek.
 
-        - Sucht nach id == prompt_id in self.prompts
-        - Aktualisiert Felder name, tags, prompt
+        - Sucht nach id == prompt_id im aktuellen Snapshot
+        - Aktualisiert Felder name, tags, prompt (als Kopie im neuen Snapshot)
         - Schreibt Änderungen nach data/user_prompts.json
         """
         tags = tags or []
-        updated_prompt: Optional[Dict] = None
 
         # In Memory aktualisieren
-        for p in self.prompts:
-            if p.get("id") == prompt_id:
-                p["name"] = name
-                p["tags"] = tags
-                p["prompt"] = prompt_text
-                updated_prompt = p
-                break
-
-        if updated_prompt is None:
-            return None
-
-        # user_prompts.json aktualisieren
-        user_path = Path(__file__).parent / "data" / "user_prompts.json"
-        try:
-            user_data: List[Dict]
-            if user_path.exists():
-                with open(user_path, "r", encoding="utf-8") as f:
-                    raw = f.read().strip()
-                    user_data = json.loads(raw) if raw else []
-            else:
-                user_data = []
-
-            if isinstance(user_data, dict) and "prompts" in user_data:
-                user_data = user_data["prompts"]
-
-            found = False
-            for up in user_data:
-                if up.get("id") == prompt_id:
-                    up.update({
-                        "name": name,
-                        "tags": tags,
-                        "prompt": prompt_text,
-                    })
-                    found = True
-                    break
-            if not found:
-                user_data.append(updated_prompt)
-
-            with open(user_path, "w", encoding="utf-8") as f:
-                json.dump(user_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"[ERROR] Fehler beim Aktualisieren in user_prompts.json: {e}")
-
-        return updated_prompt
+        with self._write_lock:
+            snapshot = self._snapshot
+            index = snapshot.find(prompt_id)
+            if index is None:
+                return None
+            updated_prompt = dict(snapshot.prompts[index])
+            updated_prompt.update({
+                "name": name,
+                "tags": tags,
+                "prompt": prompt_text,
+                "placeholders": list(PromptTemplate(prompt_text).placeholders),
+            })
+            self._snapshot = snapshot.with_prompt(index, updated_prompt)
+
+            # user_prompts.json aktualisieren
+            user_path = Path(__file__).parent / "data" / "user_prompts.json"
+            try:
+                user_data: List[Dict]
+                if user_path.exists():
+                    with open(user_path, "r", encoding="utf-8") as f:
+                        raw = f.read().strip()
+                        user_data = json.loads(raw) if raw else []
+                else:
+                    user_data = []
+
+                if isinstance(user_data, dict) and "prompts" in user_data:
+                    user_data = user_data["prompts"]
+
+                found = False
+                for up in user_data:
+                    if up.get("id") == prompt_id:
+                        up.update({
+                            "name": name,
+                            "tags": tags,
+                            "prompt": prompt_text,
+                            "placeholders": updated_prompt["placeholders"],
+                        })
+                        found = True
+                        break
+                if not found:
+                    user_data.append(updated_prompt)
+
+                with open(user_path, "w", encoding="utf-8") as f:
+                    json.dump(user_data, f, ensure_ascii=False, indent=2)
+            except Exception as e:
+                print(f"[ERROR] Fehler beim Aktualisieren in user_prompts.json: {e}")
+
+        return updated_prompt.copy()
@@ -0,0 +1,145 @@
+"""
+templates.py - Platzhalter-Vorlagen für Prompts
+
+Prompts können Platzhalter in eckigen Klammern enthalten, z.B. "[problem domain]".
+Ein Platzhalter-Name beginnt mit einem Buchstaben und enthält nur Buchstaben,
+Ziffern, "_", "-" und Leerzeichen. Andere Klammerausdrücke wie '["a", "b"]',
+"[1, 2, 3]", Indizierung direkt nach einem Wort oder "]" ("df[column]", "m[i][j]"),
+Markdown-Links "[text](url)" und Checkboxen "- [x]" bleiben unverändert.
+Ein Prompt-Text wird einmal zu einer PromptTemplate kompiliert; danach kann er
+beliebig oft (auch im Batch, z.B. aus einer CSV-Datei) befüllt werden, ohne den
+Text erneut zu durchsuchen.
+
+Batch-Aufruf (eine JSON-Zeile pro befülltem Prompt):
+    python templates.py orga werte.csv --out prompts.jsonl
+"""
+
+import argparse
+import csv
+import json
+import re
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+
+# Platzhalter: "[name]", Name beginnt mit einem Buchstaben, danach Buchstaben, Ziffern,
+# "_", "-" und Leerzeichen; Indizierung ("arr[i]") und Markdown-Links "[text](url)" zählen nicht
+PLACEHOLDER_PATTERN = re.compile(r"(?<![\w\]])\[([^\W\d_][\w \-]*)\](?!\()")
+
+# Zeilenanfang einer Markdown-Checkbox ("- [x] erledigt", "1. [X] ...")
+CHECKBOX_PREFIX = re.compile(r"[ \t]*(?:[-*+]|\d+[.)])[ \t]+")
+
+
+class PromptTemplate:
+    """Kompilierte Vorlage eines Prompt-Texts.
+
+    Beim Kompilieren wird der Text in einen Format-String übersetzt, in dem jedes
+    Vorkommen eines Platzhalters ein eigenes Feld erhält. Rendern ist damit ein
+    einzelner str.format-Aufruf; ohne Wert bleibt das Vorkommen wörtlich erhalten.
+    """
+
+    __slots__ = ("text", "placeholders", "_slots", "_format")
+
+    def __init__(self, text: str):
+        """Args:
+            text: Prompt-Text mit Platzhaltern in eckigen Klammern
+        """
+        self.text = text
+        names: Dict[str, None] = {}
+        slots: List[Tuple[str, str]] = []
+        parts: List[str] = []
+        pos = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            if self._is_checkbox(text, match):
+                continue
+            name = match.group(1).strip()
+            names.setdefault(name)
+            parts.append(self._escape(text[pos:match.start()]))
+            parts.append(f"{{{len(slots)}}}")
+            slots.append((name, match.group(0)))
+            pos = match.end()
+        parts.append(self._escape(text[pos:]))
+
+        self.placeholders: Tuple[str, ...] = tuple(names)
+        # (Name, Originaltext) je Vorkommen, z.B. ("name", "[name ]")
+        self._slots: Tuple[Tuple[str, str], ...] = tuple(slots)
+        self._format = "".join(parts).format
+
+    @staticmethod
+    def _is_checkbox(text: str, match: "re.Match") -> bool:
+        """Prüft, ob "[x]" eine Markdown-Checkbox hinter einem Listenpunkt ist."""
+        if match.group(1) not in ("x", "X"):
+            return False
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        return CHECKBOX_PREFIX.fullmatch(text, line_start, match.start()) is not None
+
+    @staticmethod
+    def _escape(literal: str) -> str:
+        return literal.replace("{", "{{").replace("}", "}}")
+
+    def render(self, values: Mapping[str, str]) -> str:
+        """Setzt die Werte ein; fehlende oder leere Werte lassen den Platzhalter unverändert stehen."""
+        if not self.placeholders:
+            return self.text
+        return self._format(*[values.get(name) or original for name, original in self._slots])
+
+    def render_many(self, rows: Iterable[Mapping[str, str]]) -> Iterator[str]:
+        """Rendert die Vorlage für viele Wertesätze in einem Durchlauf."""
+        if not self.placeholders:
+            for _ in rows:
+                yield self.text
+            return
+        fmt = self._format
+        slots = self._slots
+        for row in rows:
+            yield fmt(*[row.get(name) or original for name, original in slots])
+
+
+def read_csv_rows(path: str, delimiter: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    """Liest Wertesätze aus einer CSV-Datei (erste Zeile = Platzhalter-Namen).
+
+    Args:
+        path: Pfad zur CSV-Datei
+        delimiter: Trennzeichen; ohne Angabe wird es erkannt (",", ";" oder Tab).
+                   Bei nur einer Spalte lässt es sich nicht erkennen, dann gilt ",".
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if delimiter:
+            reader = csv.DictReader(f, delimiter=delimiter)
+        else:
+            try:
+                dialect = csv.Sniffer().sniff(f.read(4096), delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            f.seek(0)
+            reader = csv.DictReader(f, dialect=dialect)
+        for row in reader:
+            yield {key.strip(): (value or "").strip() for key, value in row.items() if key}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Befüllt eine Prompt-Vorlage mit Werten aus einer CSV-Datei")
+    parser.add_argument("prompt_id", help="ID des Prompts in der Bibliothek")
+    parser.add_argument("csv", help="CSV-Datei, Spalten = Platzhalter-Namen")
+    parser.add_argument("--delimiter", help="Trennzeichen der CSV-Datei (Standard: automatisch erkennen)")
+    parser.add_argument("--out", help="Ausgabedatei (JSON Lines), Standard: Konsole")
+    parser.add_argument("--library", action="append", help="Alternative Bibliothek (mehrfach möglich)")
+    args = parser.parse_args()
+
+    from search import PromptSearch  # erst hier, search.py importiert dieses Modul
+
+    engine = PromptSearch(args.library)
+    rendered = engine.render_batch(args.prompt_id, read_csv_rows(args.csv, args.delimiter))
+    if rendered is None:
+        parser.error(f"Prompt nicht gefunden: {args.prompt_id}")
+    if not args.out:
+        for text in rendered:
+            print(json.dumps({"prompt": text}, ensure_ascii=False))
+        return
+    with open(args.out, "w", encoding="utf-8") as f:
+        for text in rendered:
+            f.write(json.dumps({"prompt": text}, ensure_ascii=False) + "\n")
+    print(f"[INFO] {len(rendered)} Prompts geschrieben: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,12 @@ Ein schlichtes Suchfenster, das:
 - als normales Windows-Fenster mit Min/Max/Close erscheint
 - Sucheingabe entgegennimmt
 - Ergebnisliste anzeigt
-- bei Enter den Prompt kopiert und einfügt
+- bei Enter den Prompt kopiert und einfügt (Platzhalter vorher per Dialog befüllt)
 - über eine Menüleiste Import und Bearbeitung von Prompts erlaubt
 """
 
+import time
+
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLineEdit, QListWidget,
     QListWidgetItem, QLabel,
@@ -20,6 +22,8 @@ from PyQt6.QtGui import QFont, QKeyEvent, QKeySequence, QShortcut, QAction
 
 from search import PromptSearch
 from clipboard_manager import ClipboardManager
+from query_log import QueryRecorder
+from templates import PromptTemplate
 
 
 class NewPromptDialog(QDialog):
@@ -64,6 +68,39 @@ class NewPromptDialog(QDialog):
         return name, tags, prompt_text, self._original_id
 
 
+class PlaceholderDialog(QDialog):
+    """Dialog zum Befüllen der Platzhalter eines Prompts vor dem Einfügen."""
+
+    def __init__(self, template: PromptTemplate, title: str = "", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Platzhalter ausfüllen – {title}" if title else "Platzhalter ausfüllen")
+        self.setModal(True)
+        self.setMinimumWidth(400)
+
+        self._template = template
+        self._edits: dict[str, QLineEdit] = {}
+
+        layout = QFormLayout(self)
+        for name in template.placeholders:
+            edit = QLineEdit(self)
+            edit.setPlaceholderText(name)
+            self._edits[name] = edit
+            layout.addRow(name, edit)
+
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel,
+            parent=self,
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def get_text(self) -> str:
+        """Gibt den Prompt-Text mit den eingegebenen Werten zurück."""
+        values = {name: edit.text().strip() for name, edit in self._edits.items()}
+        return self._template.render(values)
+
+
 class SearchWindow(QWidget):
     """Hauptfenster für die Prompt-Suche.
 
@@ -73,13 +110,26 @@ class SearchWindow(QWidget):
     - Zentriert auf dem Bildschirm
     - Fuzzy-Search während der Eingabe
     - Tastaturnavigation
+    - Optionale Aufzeichnung der Suchanfragen (query_log_enabled)
     """
 
     def __init__(self, config):
         super().__init__()
         self.config = config
-        self.search_engine = PromptSearch()
+        self.search_engine = PromptSearch(
+            min_score=config.get("search_min_score", 50),
+            prefilter=config.get("search_prefilter", "length"),
+            prefilter_cutoff=config.get("search_prefilter_cutoff", 40),
+            prefilter_pool=int(config.get("search_prefilter_pool", 200)),
+            parallel_threshold=int(config.get("parallel_search_threshold", 0)),
+            workers=int(config.get("search_workers", -1)),
+        )
         self.clipboard = ClipboardManager()
+        self.query_recorder = (
+            QueryRecorder(config.get("query_log_path", "data/query_log.jsonl"))
+            if config.get("query_log_enabled", False)
+            else None
+        )
 
         self._setup_window()
         self._setup_ui()
@@ -176,7 +226,7 @@ class SearchWindow(QWidget):
         layout.addWidget(info)
 
         # Initiale Ergebnisse laden
-        self._update_results("")
+        self._update_results("", record=False)
 
     def _setup_shortcuts(self):
         """Konfiguriert Tastaturkürzel."""
@@ -213,13 +263,22 @@ class SearchWindow(QWidget):
         """Wird aufgerufen wenn sich der Suchtext ändert."""
         self._update_results(text)
 
-    def _update_results(self, query: str):
-        """Aktualisiert die Ergebnisliste basierend auf der Suche."""
+    def _update_results(self, query: str, record: bool = True):
+        """Aktualisiert die Ergebnisliste basierend auf der Suche.
+
+        Args:
+            query: Suchtext
+            record: Anfrage im Query-Log aufzeichnen (nur für Eingaben im Suchfeld)
+        """
         self.results_list.clear()
 
+        start = time.perf_counter()
         results = self.search_engine.search(
             query, limit=self.config.get("max_results", 20)
         )
+        if record and self.query_recorder:
+            latency_ms = (time.perf_counter() - start) * 1000
+            self.query_recorder.record_query(query, latency_ms, len(results))
 
         for prompt in results:
             item = QListWidgetItem()
@@ -235,7 +294,19 @@ class SearchWindow(QWidget):
         prompt_data = item.data(Qt.ItemDataRole.UserRole)
 
         if prompt_data:
-            self.clipboard.copy(prompt_data.get("prompt", ""))
+            text = prompt_data.get("prompt", "")
+            template = self.search_engine.get_template(prompt_data.get("id", ""), text)
+            if template and template.placeholders:
+                dialog = PlaceholderDialog(template, prompt_data.get("name", ""), self)
+                if dialog.exec() != QDialog.DialogCode.Accepted:
+                    return
+                text = dialog.get_text()
+
+            if self.query_recorder:
+                self.query_recorder.record_selection(
+                    prompt_data.get("id"), prompt_data.get("_index"), self.results_list.row(item)
+                )
+            self.clipboard.copy(text)
             self.hide()
             QTimer.singleShot(100, self.clipboard.paste)
             if "id" in prompt_data:
@@ -252,7 +323,7 @@ class SearchWindow(QWidget):
             new_prompt = self.search_engine.add_prompt(name, prompt_text, tags)
             print(f"[INFO] Neuer Prompt angelegt: {new_prompt.get('name')} ({new_prompt.get('id')})")
             current_query = self.search_input.text()
-            self._update_results(current_query)
+            self._update_results(current_query, record=False)
 
     def _edit_selected_prompt(self):
         """Bearbeitet den aktuell ausgewählten Prompt (User-Prompts werden ersetzt)."""
@@ -272,7 +343,7 @@ class SearchWindow(QWidget):
             if updated:
                 print(f"[INFO] Prompt aktualisiert: {updated.get('name')} ({updated.get('id')})")
                 current_query = self.search_input.text()
-                self._update_results(current_query)
+                self._update_results(current_query, record=False)
 
     def _import_library(self):
         """Importiert eine externe Prompt-Bibliothek (JSON)."""
@@ -285,7 +356,7 @@ class SearchWindow(QWidget):
         if not file_path:
             return
         self.search_engine.add_library(file_path)
-        self._update_results(self.search_input.text())
+        self._update_results(self.search_input.text(), record=False)
         QMessageBox.information(
             self,
             "Import abgeschlossen",
@@ -307,7 +378,19 @@ class SearchWindow(QWidget):
         y = (screen.height() - self.height()) // 3
         self.move(x, y)
 
+        if self.query_recorder:
+            self.query_recorder.start_session()
         self.search_input.clear()
         self.show()
         self.activateWindow()
         self.search_input.setFocus()
+
+    def hideEvent(self, event):
+        """Schließt beim Verstecken des Fensters die laufende Such-Sitzung ab.
+
+        Spontane Hide-Events (z.B. Minimieren) beenden die Sitzung nicht, da nach dem
+        Wiederherstellen kein show_and_focus und damit keine neue Sitzung folgt.
+        """
+        if self.query_recorder and not event.spontaneous():
+            self.query_recorder.end_session()
+        super().hideEvent(event)